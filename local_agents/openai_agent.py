@@ -1,25 +1,143 @@
+import asyncio
+import hashlib
 import logging
 import os
-from openai import OpenAI
+import re
+from collections.abc import AsyncIterator
+from openai import AsyncOpenAI
+from utils.response_cache import lookup_response, store_response
 
 logger = logging.getLogger(__name__)
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+_OPENAI_ENABLED = bool(OPENAI_API_KEY)
+OPENAI_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are a helpful assistant."
+# Routes every request sharing SYSTEM_PROMPT to the same OpenAI prefix cache; bump with the prompt.
+PROMPT_CACHE_KEY = "wa-assistant-v1"
+# Keep bursts under the account's rate limit instead of triggering 429 storms.
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+_openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
 
-async def get_openai_response(message: str) -> str:
-    if not openai_client.api_key:
+# Streamed replies are flushed once this much text is buffered and a sentence ends.
+STREAM_FLUSH_CHARS = 400
+# WhatsApp rejects text bodies over 4096 characters.
+WHATSAPP_MAX_CHARS = 4096
+ERROR_REPLY = "I encountered an error. Please try again later."
+# A sentence ends at a newline, or at . ! ? followed by whitespace. "2.0" and URLs
+# don't match, and neither does a terminator at the end of the buffer, since the
+# next delta may continue the number.
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+# Replies being generated right now, keyed by normalized prompt, so identical
+# messages arriving together share one OpenAI call.
+_inflight: dict[str, asyncio.Future] = {}
+
+def _split_at_sentence(buffer: str) -> tuple[str, str]:
+    cut = -1
+    # Scan one character past the limit so a terminator at the limit can see what follows it.
+    for match in _SENTENCE_END.finditer(buffer, 0, WHATSAPP_MAX_CHARS + 1):
+        if match.start() < WHATSAPP_MAX_CHARS:
+            cut = match.start()
+    if cut == -1:
+        if len(buffer) < WHATSAPP_MAX_CHARS:
+            return "", buffer
+        cut = WHATSAPP_MAX_CHARS - 1
+    return buffer[:cut + 1].strip(), buffer[cut + 1:]
+
+def split_for_whatsapp(text: str) -> list[str]:
+    # Splits a finished reply into parts WhatsApp accepts, preferring sentence ends.
+    parts = []
+    while len(text) > WHATSAPP_MAX_CHARS:
+        ready, text = _split_at_sentence(text)
+        if ready:
+            parts.append(ready)
+    if text.strip():
+        parts.append(text.strip())
+    return parts
+
+def _seed_for(message: str) -> int:
+    # Same message, same seed: repeated questions get reproducible sampling.
+    return int.from_bytes(hashlib.blake2b(message.encode(), digest_size=4).digest(), "little")
+
+def create_openai_client() -> AsyncOpenAI | None:
+    if not _OPENAI_ENABLED:
+        return None
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=5, timeout=30.0)
+
+async def stream_openai_response(openai_client: AsyncOpenAI | None, message: str) -> AsyncIterator[str]:
+    if not _OPENAI_ENABLED:
         logger.error("OpenAI API key is not set.")
-        return "Sorry, I can't connect to my brain right now."
+        yield "Sorry, I can't connect to my brain right now."
+        return
 
+    key = message.strip().lower()
+    pending = _inflight.get(key)
+    if pending is not None:
+        logger.info(f"Joining in-flight OpenAI request for '{message}'")
+        for part in await asyncio.shield(pending):
+            yield part
+        return
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    reply = []
+    try:
+        async for part in _stream_reply(openai_client, message):
+            reply.append(part)
+            yield part
+    finally:
+        del _inflight[key]
+        future.set_result(reply or [ERROR_REPLY])
+
+async def _stream_reply(openai_client: AsyncOpenAI, message: str) -> AsyncIterator[str]:
+    cached = await lookup_response(openai_client, message)
+    if cached is not None:
+        logger.info(f"Answering '{message}' from the response cache")
+        for part in cached:
+            yield part
+        return
+
+    # The parts exactly as sent, so a cache hit replays the same WhatsApp messages.
+    sent = []
+    buffer = ""
     try:
         logger.info(f"Sending to OpenAI: '{message}'")
-        completion = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": message}
-            ]
-        )
-        return completion.choices[0].message.content
+        async with _openai_semaphore:
+            stream = await openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": message}
+                ],
+                stream=True,
+                prompt_cache_key=PROMPT_CACHE_KEY,
+                seed=_seed_for(message),
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                buffer += delta
+                # Loop so one large delta can't leave more than a message's worth buffered.
+                while len(buffer) >= STREAM_FLUSH_CHARS:
+                    ready, rest = _split_at_sentence(buffer)
+                    if len(rest) == len(buffer):
+                        break
+                    buffer = rest
+                    if ready:
+                        sent.append(ready)
+                        yield ready
     except Exception as e:
         logger.error(f"Error calling OpenAI API: {e}")
-        return "I encountered an error. Please try again later."
+        failed = True
+    else:
+        failed = False
+
+    if buffer.strip():
+        sent.append(buffer.strip())
+        yield sent[-1]
+    if not sent:
+        # Errors and empty completions both get a reply, for the caller and any coalesced followers.
+        yield ERROR_REPLY
+    elif not failed:
+        store_response(message, tuple(sent))
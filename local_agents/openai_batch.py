@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import httpx
+import orjson
+from openai import AsyncOpenAI
+from local_agents.openai_agent import OPENAI_MODEL, PROMPT_CACHE_KEY, SYSTEM_PROMPT, split_for_whatsapp
+from utils.whatsapp_utils import send_whatsapp_message
+
+# Batch jobs are billed at half price but may take up to 24h, so they are only
+# meant for scheduled flows (digests, summaries); live chat uses stream_openai_response.
+# submit_batch takes [{"to": <phone number>, "message": <prompt>}] and poll_batch
+# sends each completion back to its "to" number once the job finishes.
+logger = logging.getLogger(__name__)
+BATCH_POLL_INTERVAL = 60.0
+# A digest batch can hold thousands of replies; keep the sends well inside the
+# httpx pool and WhatsApp's throughput limits.
+BATCH_SEND_CONCURRENCY = 16
+
+async def submit_batch(openai_client: AsyncOpenAI, messages: list[dict]) -> str:
+    lines = [
+        orjson.dumps({
+            "custom_id": f"{index}:{item['to']}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": OPENAI_MODEL,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": item["message"]},
+                ],
+                "prompt_cache_key": PROMPT_CACHE_KEY,
+            },
+        })
+        for index, item in enumerate(messages)
+    ]
+    batch_file = await openai_client.files.create(
+        file=("batch.jsonl", b"\n".join(lines)),
+        purpose="batch",
+    )
+    batch = await openai_client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logger.info("Submitted OpenAI batch %s with %d requests", batch.id, len(lines))
+    return batch.id
+
+async def poll_batch(
+    openai_client: AsyncOpenAI,
+    httpx_client: httpx.AsyncClient,
+    batch_id: str,
+    interval: float = BATCH_POLL_INTERVAL,
+):
+    while True:
+        batch = await openai_client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            break
+        if batch.status in ("failed", "expired", "cancelled"):
+            logger.error("OpenAI batch %s ended with status %s", batch_id, batch.status)
+            return
+        await asyncio.sleep(interval)
+
+    if not batch.output_file_id:
+        logger.error("OpenAI batch %s completed without an output file", batch_id)
+        return
+
+    send_semaphore = asyncio.Semaphore(BATCH_SEND_CONCURRENCY)
+
+    async def send(to_number: str, parts: list[str]) -> bool:
+        # A reply only counts as delivered once every part has gone out, in order.
+        async with send_semaphore:
+            for part in parts:
+                if not await send_whatsapp_message(httpx_client, to_number, part):
+                    return False
+            return True
+
+    output = await openai_client.files.content(batch.output_file_id)
+    sends = []
+    for line in output.content.splitlines():
+        if not line:
+            continue
+        result = orjson.loads(line)
+        to_number = result["custom_id"].split(":", 1)[1]
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            logger.error("Batch request %s failed: %s", result["custom_id"], result.get("error"))
+            continue
+        message = response["body"]["choices"][0]["message"]["content"]
+        if not message or not message.strip():
+            # Refusals come back with no content; there is nothing to send.
+            logger.warning("Batch request %s returned no content", result["custom_id"])
+            continue
+        sends.append(send(to_number, split_for_whatsapp(message)))
+    delivered = sum(await asyncio.gather(*sends))
+    logger.info("Delivered %d of %d replies from OpenAI batch %s", delivered, len(sends), batch_id)
+    if delivered < len(sends):
+        logger.error("%d replies from OpenAI batch %s could not be sent", len(sends) - delivered, batch_id)
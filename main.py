@@ -1,20 +1,63 @@
-from fastapi import FastAPI
 from dotenv import load_dotenv
 from utils.logging_config import configure_logging
-from schema.graphql_schema import schema
-from strawberry.fastapi import GraphQLRouter
-from routes.webhook import router as webhook_router
 
+# The app modules read their settings at import time, so .env and logging
+# must be in place before they are imported.
 load_dotenv()
 configure_logging()
 
-app = FastAPI()
+import os
+from contextlib import asynccontextmanager
+import orjson
+from fastapi import FastAPI, Response
+from local_agents.openai_agent import create_openai_client
+from routes.webhook import router as webhook_router
+from utils.whatsapp_utils import create_httpx_client
+
+ENABLE_GRAPHQL = os.getenv("ENABLE_GRAPHQL", "1") == "1"
+_ALIVE_BODY = orjson.dumps({"message": "✅ WhatsApp FastAPI Webhook is alive!"})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.openai_client = create_openai_client()
+    app.state.httpx_client = create_httpx_client()
+    yield
+    await app.state.httpx_client.aclose()
+    if app.state.openai_client is not None:
+        await app.state.openai_client.close()
+
+app = FastAPI(lifespan=lifespan)
+
+def include_graphql(app: FastAPI):
+    # Strawberry is heavy to import, so it is only loaded when GraphQL is enabled.
+    from schema.graphql_schema import schema
+    from strawberry.fastapi import GraphQLRouter
+
+    app.include_router(GraphQLRouter(schema), prefix="/graphql")
 
 # Register GraphQL and webhook routes
-graphql_app = GraphQLRouter(schema)
-app.include_router(graphql_app, prefix="/graphql")
+if ENABLE_GRAPHQL:
+    include_graphql(app)
 app.include_router(webhook_router)
 
 @app.get("/")
-def read_root():
-    return {"message": "✅ WhatsApp FastAPI Webhook is alive!"}
+async def read_root():
+    return Response(content=_ALIVE_BODY, media_type="application/json")
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Production entrypoint: one event loop per core (override with WEB_CONCURRENCY),
+    # and a Unix socket when running behind a reverse proxy on the same host.
+    # Each worker keeps its own clients and response cache.
+    # Use `uvicorn main:app --reload` for local development.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        uds=os.getenv("UVICORN_UDS"),
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",
+        http="httptools",
+        log_level="info",
+    )
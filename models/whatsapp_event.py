@@ -0,0 +1,30 @@
+import msgspec
+
+# Only the fields the webhook reads are declared; msgspec skips everything else
+# in Meta's payload without building Python objects for it.
+
+class WAText(msgspec.Struct):
+    body: str = ""
+
+class WAMessage(msgspec.Struct):
+    from_: str = msgspec.field(name="from", default="")
+    type: str = ""
+    text: WAText | None = None
+
+class WAStatus(msgspec.Struct):
+    id: str = ""
+    status: str = ""
+
+class WAValue(msgspec.Struct):
+    messages: list[WAMessage] = []
+    statuses: list[WAStatus] = []
+
+class WAChange(msgspec.Struct):
+    value: WAValue | None = None
+
+class WAEntry(msgspec.Struct):
+    changes: list[WAChange] = []
+
+class WAWebhook(msgspec.Struct):
+    object: str = ""
+    entry: list[WAEntry] = []
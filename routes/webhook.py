@@ -1,16 +1,19 @@
-import json
+import asyncio
 import os
 import logging
-from fastapi import APIRouter, Request, Response, status, Query as FastapiQuery
-from local_agents.openai_agent import get_openai_response
+import msgspec
+from fastapi import APIRouter, BackgroundTasks, Request, Response, status, Query as FastapiQuery
+from local_agents.openai_agent import stream_openai_response
+from models.whatsapp_event import WAWebhook
 from utils.whatsapp_utils import send_whatsapp_message
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 VERIFY_TOKEN = os.getenv("VERIFY_TOKEN")
+_webhook_decoder = msgspec.json.Decoder(WAWebhook)
 
 @router.get("/webhook")
-def verify_webhook(
+async def verify_webhook(
     mode: str = FastapiQuery(None, alias="hub.mode"),
     token: str = FastapiQuery(None, alias="hub.verify_token"),
     challenge: str = FastapiQuery(None, alias="hub.challenge"),
@@ -22,30 +25,74 @@ def verify_webhook(
         return Response(status_code=status.HTTP_403_FORBIDDEN)
     return Response(status_code=status.HTTP_400_BAD_REQUEST)
 
+async def _send_after(previous_send, httpx_client, to_number: str, message: str):
+    if previous_send is not None:
+        await previous_send
+    await send_whatsapp_message(httpx_client, to_number, message)
+
+async def process_message(openai_client, httpx_client, from_number: str, msg_body: str):
+    # Send each finished part while OpenAI keeps generating, chaining the sends
+    # so the user still receives the parts in order.
+    previous_send = None
+    async for ai_response in stream_openai_response(openai_client, msg_body):
+        previous_send = asyncio.create_task(
+            _send_after(previous_send, httpx_client, from_number, ai_response)
+        )
+    if previous_send is not None:
+        await previous_send
+
+async def process_messages(openai_client, httpx_client, messages: list[tuple[str, str]]):
+    await asyncio.gather(
+        *(
+            process_message(openai_client, httpx_client, from_number, msg_body)
+            for from_number, msg_body in messages
+        )
+    )
+
 @router.post("/webhook")
-async def handle_webhook(request: Request):
-    body = await request.json()
-    logger.info(f"Incoming webhook message: {json.dumps(body, indent=2)}")
+async def handle_webhook(request: Request, background_tasks: BackgroundTasks):
+    raw_body = await request.body()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Incoming webhook message: %s", raw_body.decode(errors="replace"))
 
-    if body.get("object") != "whatsapp_business_account":
+    try:
+        webhook = _webhook_decoder.decode(raw_body)
+    except msgspec.ValidationError as e:
+        # Valid JSON in a shape we don't handle; acknowledge so Meta doesn't redeliver it.
+        logger.warning(f"Unexpected webhook payload: {e}")
+        return Response(status_code=200)
+    except msgspec.DecodeError:
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+
+    if webhook.object != "whatsapp_business_account":
         return Response(status_code=status.HTTP_404_NOT_FOUND)
 
-    try:
-        value = body["entry"][0]["changes"][0]["value"]
-    except (KeyError, IndexError):
+    entries = webhook.entry
+    changes = entries[0].changes if entries else None
+    value = changes[0].value if changes else None
+    if value is None:
         return Response(status_code=200)
 
-    if "statuses" in value:
-        status_data = value["statuses"][0]
-        logger.info(f"Status update for {status_data['id']}: {status_data['status']}")
+    # Delivery/read receipts outnumber user messages; acknowledge them without further work.
+    if value.statuses:
+        status_data = value.statuses[0]
+        logger.debug("Status update for %s: %s", status_data.id, status_data.status)
         return Response(status_code=200)
 
-    if "messages" in value:
-        message_entry = value["messages"][0]
-        if message_entry.get("type") == "text":
-            from_number = message_entry["from"]
-            msg_body = message_entry["text"]["body"]
-            ai_response = await get_openai_response(msg_body)
-            await send_whatsapp_message(from_number, ai_response)
+    if value.messages:
+        # Meta can deliver several messages in one event; answer all of them.
+        text_messages = [
+            (message_entry.from_, message_entry.text.body)
+            for message_entry in value.messages
+            if message_entry.type == "text" and message_entry.text is not None
+        ]
+        if text_messages:
+            # Acknowledge Meta right away; the replies are produced after the response is sent.
+            background_tasks.add_task(
+                process_messages,
+                request.app.state.openai_client,
+                request.app.state.httpx_client,
+                text_messages,
+            )
 
     return Response(status_code=200)
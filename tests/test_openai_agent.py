@@ -0,0 +1,151 @@
+import asyncio
+from types import SimpleNamespace
+
+from local_agents import openai_agent
+from local_agents.openai_agent import WHATSAPP_MAX_CHARS, _split_at_sentence, split_for_whatsapp
+
+
+def test_short_buffer_without_sentence_end_is_kept():
+    assert _split_at_sentence("still typing") == ("", "still typing")
+
+
+def test_splits_at_last_sentence_end():
+    ready, rest = _split_at_sentence("First one. Second one! Third")
+    assert ready == "First one. Second one!"
+    assert rest == " Third"
+
+
+def test_splits_at_newline():
+    ready, rest = _split_at_sentence("Line one\nLine two")
+    assert ready == "Line one"
+    assert rest == "Line two"
+
+
+def test_full_buffer_without_sentence_end_is_cut_at_limit():
+    buffer = "a" * (WHATSAPP_MAX_CHARS + 10)
+    ready, rest = _split_at_sentence(buffer)
+    assert len(ready) == WHATSAPP_MAX_CHARS
+    assert rest == "a" * 10
+
+
+def test_sentence_end_past_limit_is_clamped():
+    buffer = "a" * 4090 + "bbbbbbbbbb. more"
+    ready, rest = _split_at_sentence(buffer)
+    assert len(ready) == WHATSAPP_MAX_CHARS
+    assert ready + rest == buffer
+
+
+def test_sentence_end_right_at_limit_is_used():
+    buffer = "a" * (WHATSAPP_MAX_CHARS - 1) + ". next"
+    ready, rest = _split_at_sentence(buffer)
+    assert ready == "a" * (WHATSAPP_MAX_CHARS - 1) + "."
+    assert rest == " next"
+
+
+def test_decimal_point_is_not_a_sentence_end():
+    ready, rest = _split_at_sentence("Install version 2.0 and restart. Then")
+    assert ready == "Install version 2.0 and restart."
+    assert rest == " Then"
+
+
+def test_url_is_not_split():
+    buffer = "See https://example.com/docs?q=1 for details"
+    assert _split_at_sentence(buffer) == ("", buffer)
+
+
+def test_terminator_at_end_of_buffer_waits_for_next_delta():
+    assert _split_at_sentence("Running version 2.") == ("", "Running version 2.")
+
+
+def test_split_for_whatsapp_keeps_short_reply_whole():
+    assert split_for_whatsapp("  Short digest. Two sentences.  ") == ["Short digest. Two sentences."]
+
+
+def test_split_for_whatsapp_cuts_long_reply_at_sentences():
+    text = "Sentence number one. " * 400
+    parts = split_for_whatsapp(text)
+    assert len(parts) > 1
+    assert all(len(part) <= WHATSAPP_MAX_CHARS for part in parts)
+    assert all(part.endswith(".") for part in parts)
+    assert " ".join(parts) == text.strip()
+
+
+class _FakeStream:
+    def __init__(self, deltas):
+        self._deltas = iter(deltas)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        try:
+            content = next(self._deltas)
+        except StopIteration:
+            raise StopAsyncIteration
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class _FakeCompletions:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return _FakeStream(self.deltas)
+
+
+def _fake_client(deltas):
+    return SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(deltas)))
+
+
+async def _collect(openai_client, message):
+    return [part async for part in openai_agent.stream_openai_response(openai_client, message)]
+
+
+def test_cache_hit_replays_the_streamed_parts(monkeypatch):
+    monkeypatch.setattr(openai_agent, "_OPENAI_ENABLED", True)
+    client = _fake_client(["Intro. " + "word " * 1200 + "end. ", "tail"])
+
+    first = asyncio.run(_collect(client, "cache replay test"))
+    second = asyncio.run(_collect(client, "Cache replay test "))
+
+    assert client.chat.completions.calls == 1
+    assert second == first
+    assert all(len(part) <= WHATSAPP_MAX_CHARS for part in second)
+
+
+def test_concurrent_identical_prompts_share_one_completion(monkeypatch):
+    monkeypatch.setattr(openai_agent, "_OPENAI_ENABLED", True)
+    client = _fake_client(["First sentence. " * 40, "Last bit"])
+
+    async def ask_together():
+        return await asyncio.gather(
+            _collect(client, "single flight test"),
+            _collect(client, "Single flight test"),
+            _collect(client, " single flight test "),
+        )
+
+    first, second, third = asyncio.run(ask_together())
+
+    assert client.chat.completions.calls == 1
+    assert len(first) > 1
+    assert first == second == third
+    assert openai_agent._inflight == {}
+
+
+def test_empty_completion_gets_the_error_reply(monkeypatch):
+    monkeypatch.setattr(openai_agent, "_OPENAI_ENABLED", True)
+    client = _fake_client(["   "])
+
+    async def ask_together():
+        return await asyncio.gather(
+            _collect(client, "empty completion test"),
+            _collect(client, "empty completion test"),
+        )
+
+    leader, follower = asyncio.run(ask_together())
+
+    assert client.chat.completions.calls == 1
+    assert leader == follower == [openai_agent.ERROR_REPLY]
@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+
+from local_agents import openai_batch
+from local_agents.openai_agent import WHATSAPP_MAX_CHARS
+
+
+def _output_line(custom_id, content):
+    return orjson.dumps({
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {"choices": [{"message": {"content": content}}]},
+        },
+        "error": None,
+    })
+
+
+def _fake_openai(lines):
+    async def retrieve(batch_id):
+        return SimpleNamespace(status="completed", output_file_id="file-out")
+
+    async def content(file_id):
+        return SimpleNamespace(content=b"\n".join(lines))
+
+    return SimpleNamespace(
+        batches=SimpleNamespace(retrieve=retrieve),
+        files=SimpleNamespace(content=content),
+    )
+
+
+def test_poll_batch_splits_long_replies_and_skips_empty_content(monkeypatch):
+    sent = []
+
+    async def fake_send(client, to_number, message):
+        sent.append((to_number, message))
+        return True
+
+    monkeypatch.setattr(openai_batch, "send_whatsapp_message", fake_send)
+    digest = "A long digest line. " * 500
+    openai_client = _fake_openai([
+        _output_line("0:111", digest),
+        _output_line("1:222", None),
+        _output_line("2:333", "Short summary."),
+    ])
+
+    asyncio.run(openai_batch.poll_batch(openai_client, None, "batch-1"))
+
+    long_parts = [message for to_number, message in sent if to_number == "111"]
+    assert len(long_parts) > 1
+    assert all(len(part) <= WHATSAPP_MAX_CHARS for part in long_parts)
+    assert " ".join(long_parts) == digest.strip()
+    assert ("333", "Short summary.") in sent
+    assert all(to_number != "222" for to_number, _ in sent)
+
+
+def test_poll_batch_stops_a_reply_after_a_failed_part(monkeypatch):
+    sent = []
+
+    async def fake_send(client, to_number, message):
+        sent.append(message)
+        return len(sent) > 1
+
+    monkeypatch.setattr(openai_batch, "send_whatsapp_message", fake_send)
+    openai_client = _fake_openai([_output_line("0:111", "Part of a digest. " * 500)])
+
+    asyncio.run(openai_batch.poll_batch(openai_client, None, "batch-1"))
+
+    assert len(sent) == 1
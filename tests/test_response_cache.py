@@ -0,0 +1,48 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+import utils.response_cache
+
+
+@pytest.fixture
+def semantic_cache(monkeypatch):
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "1")
+    module = importlib.reload(utils.response_cache)
+    yield module
+    monkeypatch.delenv("SEMANTIC_CACHE_ENABLED")
+    importlib.reload(utils.response_cache)
+
+
+class _FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, model, input):
+        self.calls += 1
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, 0.0, 0.0])])
+
+
+def test_semantic_hit_is_written_back_to_the_exact_cache(semantic_cache):
+    embeddings = _FakeEmbeddings()
+    client = SimpleNamespace(embeddings=embeddings)
+
+    assert asyncio.run(semantic_cache.lookup_response(client, "hello there")) is None
+    semantic_cache.store_response("hello there", ("Hi!",))
+
+    assert asyncio.run(semantic_cache.lookup_response(client, "hello there!")) == ("Hi!",)
+    assert embeddings.calls == 2
+    assert asyncio.run(semantic_cache.lookup_response(client, "hello there!")) == ("Hi!",)
+    assert embeddings.calls == 2
+
+
+def test_expired_semantic_entries_are_skipped(semantic_cache, monkeypatch):
+    client = SimpleNamespace(embeddings=_FakeEmbeddings())
+    monkeypatch.setattr(semantic_cache, "RESPONSE_CACHE_TTL", -1.0)
+
+    asyncio.run(semantic_cache.lookup_response(client, "old question"))
+    semantic_cache.store_response("old question", ("Stale answer",))
+
+    assert asyncio.run(semantic_cache.lookup_response(client, "old question?")) is None
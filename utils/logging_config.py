@@ -1,7 +1,28 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 
 def configure_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    # The handler lock and the blocking stderr write move to a listener thread.
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     )
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # QueueHandler.prepare() still interpolates the message and renders any traceback
+    # on the calling thread; the listener's StreamHandler then applies the format above.
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
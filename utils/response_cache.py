@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import time
+from cachetools import TLRUCache, TTLCache
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+EMBEDDING_MODEL = "text-embedding-3-small"
+# The semantic layer costs an embeddings call on every exact-match miss, so it is opt-in.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = 1024
+# Greetings and other repeated prompts dominate traffic; reuse their replies for an hour.
+RESPONSE_CACHE_TTL = 3600.0
+
+if SEMANTIC_CACHE_ENABLED:
+    # numpy is only needed for the semantic layer; keep it off the default import path.
+    import numpy as np
+
+# Entries are (parts, expires_at) so a reply keeps its original expiry wherever it is stored.
+_response_cache: TLRUCache = TLRUCache(
+    maxsize=10_000,
+    ttu=lambda key, entry, now: entry[1],
+    timer=time.monotonic,
+)
+# Embeddings computed during a lookup, kept until the reply is stored alongside them.
+_pending_embeddings: TTLCache = TTLCache(maxsize=SEMANTIC_CACHE_SIZE, ttl=600)
+
+class _SemanticIndex:
+    # Fixed-size ring of normalized prompt embeddings; a lookup is one matrix-vector product.
+    def __init__(self, size: int):
+        self.size = size
+        self.matrix: "np.ndarray | None" = None
+        self.expires_at: "np.ndarray | None" = None
+        self.entries: list[tuple[tuple[str, ...], float] | None] = [None] * size
+        self.filled = 0
+        self.next_slot = 0
+
+    def search(self, embedding: "np.ndarray") -> tuple[tuple[str, ...], float] | None:
+        if not self.filled:
+            return None
+        scores = self.matrix[:self.filled] @ embedding
+        scores[self.expires_at[:self.filled] <= time.monotonic()] = -np.inf
+        best = int(scores.argmax())
+        if scores[best] >= SEMANTIC_CACHE_THRESHOLD:
+            return self.entries[best]
+        return None
+
+    def add(self, embedding: "np.ndarray", entry: tuple[tuple[str, ...], float]):
+        if self.matrix is None:
+            self.matrix = np.zeros((self.size, embedding.shape[0]), dtype=np.float32)
+            self.expires_at = np.zeros(self.size, dtype=np.float64)
+        self.matrix[self.next_slot] = embedding
+        self.expires_at[self.next_slot] = entry[1]
+        self.entries[self.next_slot] = entry
+        self.next_slot = (self.next_slot + 1) % self.size
+        self.filled = min(self.filled + 1, self.size)
+
+_semantic_index = _SemanticIndex(SEMANTIC_CACHE_SIZE)
+
+def _cache_key(prompt: str) -> bytes:
+    return hashlib.blake2b(prompt.strip().lower().encode(), digest_size=16).digest()
+
+async def _embed(openai_client: AsyncOpenAI, key: bytes, prompt: str) -> "np.ndarray | None":
+    try:
+        result = await openai_client.embeddings.create(model=EMBEDDING_MODEL, input=prompt.strip())
+    except Exception as e:
+        logger.error(f"Error computing embedding: {e}")
+        return None
+    embedding = np.asarray(result.data[0].embedding, dtype=np.float32)
+    embedding /= np.linalg.norm(embedding) or 1.0
+    _pending_embeddings[key] = embedding
+    return embedding
+
+async def lookup_response(openai_client: AsyncOpenAI, prompt: str) -> tuple[str, ...] | None:
+    key = _cache_key(prompt)
+    entry = _response_cache.get(key)
+    if entry is not None:
+        return entry[0]
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+
+    embedding = await _embed(openai_client, key, prompt)
+    if embedding is None:
+        return None
+    entry = _semantic_index.search(embedding)
+    if entry is None:
+        return None
+    # Repeats of this exact prompt now skip the embeddings call, until the original reply expires.
+    _pending_embeddings.pop(key, None)
+    _response_cache[key] = entry
+    return entry[0]
+
+def store_response(prompt: str, parts: tuple[str, ...]):
+    key = _cache_key(prompt)
+    entry = (parts, time.monotonic() + RESPONSE_CACHE_TTL)
+    _response_cache[key] = entry
+    embedding = _pending_embeddings.pop(key, None)
+    if embedding is not None:
+        _semantic_index.add(embedding, entry)
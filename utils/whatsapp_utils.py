@@ -1,29 +1,67 @@
 import os
 import httpx
 import logging
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
 logger = logging.getLogger(__name__)
 WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
 WHATSAPP_PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+_WHATSAPP_ENABLED = bool(WHATSAPP_TOKEN and WHATSAPP_PHONE_NUMBER_ID)
+# Parsed once; httpx reuses a URL instance as-is instead of re-parsing a string per request.
+WHATSAPP_URL = httpx.URL(f"https://graph.facebook.com/v18.0/{WHATSAPP_PHONE_NUMBER_ID}/messages")
 
-async def send_whatsapp_message(to_number: str, message: str):
-    url = f"https://graph.facebook.com/v18.0/{WHATSAPP_PHONE_NUMBER_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {WHATSAPP_TOKEN}",
-        "Content-Type": "application/json",
-    }
-    payload = {
+def create_httpx_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=3.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=64,
+            max_connections=128,
+            keepalive_expiry=60.0,
+        ),
+        headers={
+            "Authorization": f"Bearer {WHATSAPP_TOKEN}",
+            "Content-Type": "application/json",
+        },
+    )
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    # Only retry failures where the request cannot have reached Meta, to avoid duplicate messages.
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+@retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential_jitter(multiplier=0.5, max=8),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
+async def _post_message(client: httpx.AsyncClient, payload: bytes) -> httpx.Response:
+    response = await client.post(WHATSAPP_URL, content=payload)
+    response.raise_for_status()
+    return response
+
+async def send_whatsapp_message(client: httpx.AsyncClient, to_number: str, message: str) -> bool:
+    if not _WHATSAPP_ENABLED:
+        logger.error("WhatsApp token or phone number ID is not set.")
+        return False
+
+    payload = orjson.dumps({
         "messaging_product": "whatsapp",
         "to": to_number,
         "type": "text",
         "text": {"body": message},
-    }
+    })
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            logger.info(f"WhatsApp API response: {response.json()}")
+        response = await _post_message(client, payload)
+        logger.info("WhatsApp API ack status=%d", response.status_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("WhatsApp API response: %s", response.text)
+        return True
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error: {e.response.text}")
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
+    return False